@@ -2,9 +2,20 @@ import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 import pandas as pd
+import hashlib
 
 class AIAdvisor:
-    def __init__(self):
+    # Bump when the features, targets or recommendation logic change
+    MODEL_VERSION = "1"
+    
+    # Debt-to-income levels above which a loan is medium / high risk
+    MEDIUM_RISK_DTI = 0.3
+    HIGH_RISK_DTI = 0.4
+    
+    def __init__(self, calculator=None):
+        # Share a (memoizing) LoanCalculator with the caller to avoid recomputing
+        # the same EMI and schedules; a private one is created lazily otherwise
+        self.calculator = calculator
         self.model = None
         self.scaler = StandardScaler()
         self.trained = False
@@ -62,6 +73,20 @@ class AIAdvisor:
         
         return self.model
     
+    @property
+    def model_version(self):
+        """Version string identifying the trained model, used to invalidate cached plans"""
+        if not self.trained:
+            raise RuntimeError("Call train_advisor() before reading model_version")
+        
+        # Fingerprint what the model learned so retraining on new data changes the version
+        fingerprint = hashlib.sha256()
+        fingerprint.update(repr(self.feature_columns).encode('utf-8'))
+        fingerprint.update(repr(sorted(self.model.get_params().items())).encode('utf-8'))
+        fingerprint.update(np.ascontiguousarray(self.scaler.mean_).tobytes())
+        fingerprint.update(np.ascontiguousarray(self.model.feature_importances_).tobytes())
+        return f"{self.MODEL_VERSION}-{fingerprint.hexdigest()[:16]}"
+    
     def _calculate_optimal_extra_payment(self, row):
         """Calculate optimal extra payment based on financial parameters"""
         disposable_income = row['monthly_income'] - row['monthly_expenses']
@@ -94,6 +119,25 @@ class AIAdvisor:
             'risk_level': loan_data.get('risk_level', 'medium')
         }])
         
+        input_scaled = self._prepare_features(input_features)
+        
+        # Get prediction
+        recommended_extra = self.model.predict(input_scaled)[0]
+        
+        # Generate recommendations
+        recommendations = self._generate_detailed_recommendations(loan_data, recommended_extra)
+        
+        return recommendations
+    
+    def _get_calculator(self):
+        """Return the shared LoanCalculator, creating one on first use"""
+        if self.calculator is None:
+            from loan_calculator import LoanCalculator
+            self.calculator = LoanCalculator()
+        return self.calculator
+    
+    def _prepare_features(self, input_features):
+        """Encode and scale input rows in the same column order as training"""
         # Add risk level dummies
         risk_dummies = pd.get_dummies(input_features['risk_level'], prefix='risk')
         
@@ -112,20 +156,92 @@ class AIAdvisor:
         input_features_combined = input_features_combined[self.feature_columns]
         
         # Scale features
-        input_scaled = self.scaler.transform(input_features_combined)
-        
-        # Get prediction
-        recommended_extra = self.model.predict(input_scaled)[0]
+        return self.scaler.transform(input_features_combined)
+    
+    def get_recommendations_batch(self, loans_df):
+        """Get recommendations for a whole DataFrame of loans in one vectorized pass"""
+        if not self.trained:
+            self.train_advisor()
         
-        # Generate recommendations
-        recommendations = self._generate_detailed_recommendations(loan_data, recommended_extra)
+        n_loans = len(loans_df)
+        column = lambda name, default: (loans_df[name].fillna(default).to_numpy()
+                                        if name in loans_df.columns else np.full(n_loans, default))
+        
+        input_features = pd.DataFrame({
+            'loan_amount': loans_df['principal'].to_numpy(dtype=float),
+            'interest_rate': loans_df['annual_rate'].to_numpy(dtype=float),
+            'loan_term': loans_df['years'].to_numpy(dtype=float),
+            'credit_score': column('credit_score', 700),
+            'monthly_income': column('monthly_income', 5000),
+            'monthly_expenses': column('monthly_expenses', 3000),
+            'risk_level': column('risk_level', 'medium')
+        })
+        
+        # The synthetic target goes negative when expenses exceed income; never recommend paying less
+        recommended_extra = np.maximum(self.model.predict(self._prepare_features(input_features)), 0)
+        
+        calculator = self._get_calculator()
+        impact = calculator.calculate_early_payoff_impacts(
+            input_features['loan_amount'],
+            input_features['interest_rate'],
+            input_features['loan_term'],
+            recommended_extra
+        )
+        monthly_payment = calculator.calculate_monthly_payments(
+            input_features['loan_amount'],
+            input_features['interest_rate'],
+            input_features['loan_term']
+        )
         
-        return recommendations
+        return pd.DataFrame({
+            'recommended_extra_payment': np.round(recommended_extra, 2),
+            'months_saved': impact['months_saved'].to_numpy(),
+            'interest_saved': np.round(impact['interest_saved'].to_numpy(), 2),
+            'strategy': self._get_repayment_strategies(input_features, recommended_extra),
+            'risk_assessment': self._assess_risks(monthly_payment / input_features['monthly_income'].to_numpy(dtype=float))
+        }, index=loans_df.index)
+    
+    def get_refinance_recommendation(self, loan_data, offers, months_paid=0):
+        """Surface the best balance-transfer offer for the loan, if switching pays off"""
+        from refinance_engine import RefinanceEngine
+        calculator = self._get_calculator()
+        
+        # Balance still outstanding after the EMIs already paid
+        remaining_months = loan_data['years'] * 12 - months_paid
+        if months_paid < 0 or remaining_months <= 0:
+            raise ValueError(
+                f"months_paid must be between 0 and {loan_data['years'] * 12 - 1}, got {months_paid}"
+            )
+        monthly_payment = calculator.calculate_monthly_payment(
+            loan_data['principal'], loan_data['annual_rate'], loan_data['years']
+        )
+        outstanding = float(calculator.calculate_remaining_balances(
+            loan_data['principal'], loan_data['annual_rate'] / 12 / 100, monthly_payment, months_paid
+        ))
+        
+        engine = RefinanceEngine(calculator)
+        best = engine.best_offer(outstanding, loan_data['annual_rate'], remaining_months, offers)
+        
+        if best is None:
+            return {
+                'switch': False,
+                'message': "Stay with current lender - no offer saves money after fees"
+            }
+        
+        return {
+            'switch': True,
+            'lender': best['lender'],
+            'annual_rate': best['annual_rate'],
+            'net_savings': best['net_savings'],
+            'break_even_month': best['break_even_month'],
+            'message': (f"Switch to {best['lender']} at {best['annual_rate']}% to save "
+                        f"₹{best['net_savings']:,.0f}, recovering switching costs in "
+                        f"{int(best['break_even_month'])} months")
+        }
     
     def _generate_detailed_recommendations(self, loan_data, recommended_extra):
         """Generate detailed repayment recommendations"""
-        from loan_calculator import LoanCalculator
-        calculator = LoanCalculator()
+        calculator = self._get_calculator()
         
         # Calculate impact of recommended extra payment
         impact = calculator.calculate_early_payoff_impact(
@@ -165,10 +281,53 @@ class AIAdvisor:
         
         return strategies
     
+    def _get_repayment_strategies(self, input_features, extra_payment):
+        """Vectorized _get_repayment_strategy, strategies joined with '; '"""
+        rate = input_features['interest_rate'].to_numpy(dtype=float)
+        rate_strategy = np.select(
+            [rate > 8, rate < 5],
+            ["Aggressive repayment (high interest rate); ",
+             "Consider investing excess funds (low interest rate); "],
+            default=""
+        )
+        payment_strategy = np.where(
+            extra_payment > input_features['monthly_income'].to_numpy(dtype=float) * 0.2,
+            "Conservative extra payments recommended",
+            "Moderate extra payments sustainable"
+        )
+        credit_strategy = np.where(
+            input_features['credit_score'].to_numpy(dtype=float) < 650,
+            "; Focus on credit improvement alongside repayment",
+            ""
+        )
+        return np.char.add(np.char.add(rate_strategy, payment_strategy), credit_strategy)
+    
+    def _high_risk_label(self):
+        return f"High risk - debt exceeds {self.HIGH_RISK_DTI:.0%} of income"
+    
+    def _assess_risks(self, debt_to_income):
+        """Vectorized risk labels for an array of debt-to-income ratios"""
+        return np.select(
+            [debt_to_income > self.HIGH_RISK_DTI, debt_to_income > self.MEDIUM_RISK_DTI],
+            [self._high_risk_label(), "Medium risk - monitor budget closely"],
+            default="Low risk - manageable debt level"
+        )
+    
+    def get_stress_report(self, loan_data, **grids):
+        """Shocks (income drop, expense growth, rate hike) at which this loan crosses each risk threshold"""
+        from stress_engine import StressTester
+        portfolio = pd.DataFrame([{
+            'principal': loan_data['principal'],
+            'annual_rate': loan_data['annual_rate'],
+            'years': loan_data['years'],
+            'monthly_income': loan_data.get('monthly_income', 5000),
+            'monthly_expenses': loan_data.get('monthly_expenses', 3000)
+        }])
+        return StressTester(**grids).stress_test(portfolio).iloc[0].to_dict()
+    
     def _assess_risk(self, loan_data):
         """Assess financial risk of the loan"""
-        from loan_calculator import LoanCalculator
-        monthly_payment = LoanCalculator().calculate_monthly_payment(
+        monthly_payment = self._get_calculator().calculate_monthly_payment(
             loan_data['principal'],
             loan_data['annual_rate'],
             loan_data['years']
@@ -176,9 +335,9 @@ class AIAdvisor:
         
         debt_to_income = monthly_payment / loan_data.get('monthly_income', 5000)
         
-        if debt_to_income > 0.4:
-            return "High risk - debt exceeds 40% of income"
-        elif debt_to_income > 0.3:
+        if debt_to_income > self.HIGH_RISK_DTI:
+            return self._high_risk_label()
+        elif debt_to_income > self.MEDIUM_RISK_DTI:
             return "Medium risk - monitor budget closely"
         else:
             return "Low risk - manageable debt level"
\ No newline at end of file
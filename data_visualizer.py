@@ -1,14 +1,62 @@
+import io
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+from matplotlib.figure import Figure
 import pandas as pd
 import numpy as np
+from schedule_index import ScheduleIndex
+
+def _render_chart_png(visualizer, method_name, args):
+    """Build one chart and rasterize it to PNG bytes (runs inside a pool worker)"""
+    # Agg shares one font cache between figures: text measurement in tight_layout
+    # and rasterizing must not overlap across threads, so the whole build runs
+    # under Agg's global lock (a no-op cost in process workers)
+    with RendererAgg.lock:
+        fig = getattr(visualizer, method_name)(*args)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
 
 class DataVisualizer:
     def __init__(self):
         plt.style.use('default')
     
+    def _subplots(self, nrows=1, ncols=1, figsize=None):
+        """Create a figure on its own Agg canvas, bypassing pyplot's global state"""
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig, fig.subplots(nrows, ncols)
+    
+    def render_charts_concurrently(self, chart_jobs, max_workers=None, use_processes=False):
+        """Start rendering charts in the background and yield (name, png_bytes, error) as each finishes
+        
+        chart_jobs maps a chart name to (method_name, args) on this visualizer.
+        Rendering starts immediately, so callers can show other content first. With
+        threads, charts are drawn one at a time under Agg's lock (progressive delivery
+        only); use_processes=True renders them truly in parallel. A chart that fails
+        is yielded with png_bytes None and the exception as error.
+        """
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        executor = executor_class(max_workers=max_workers or max(len(chart_jobs), 1))
+        futures = {
+            executor.submit(_render_chart_png, self, method_name, args): name
+            for name, (method_name, args) in chart_jobs.items()
+        }
+        # Already-submitted charts keep rendering; the pool shuts down once they are done
+        executor.shutdown(wait=False)
+        return (self._chart_result(futures[future], future) for future in as_completed(futures))
+    
+    def _chart_result(self, name, future):
+        """Unpack a finished render into (name, png_bytes, error)"""
+        try:
+            return name, future.result(), None
+        except Exception as e:
+            return name, None, e
+    
     def create_amortization_chart(self, schedule_df):
         """Create amortization chart using matplotlib"""
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+        fig, (ax1, ax2) = self._subplots(1, 2, figsize=(15, 6))
         
         # Payment composition chart (first 3 years)
         months_to_show = min(36, len(schedule_df))
@@ -33,15 +81,18 @@ class DataVisualizer:
         ax2.set_ylabel('Balance (₹)')
         ax2.grid(True, alpha=0.3)
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
     
-    def create_payment_breakdown(self, schedule_df):
+    def create_payment_breakdown(self, schedule_df, schedule_index=None):
         """Create payment breakdown pie chart"""
-        total_principal = schedule_df['principal'].sum()
-        total_interest = schedule_df['interest'].sum()
+        if schedule_index is None:
+            schedule_index = ScheduleIndex(schedule_df)
+        totals = schedule_index.totals()
+        total_principal = totals['principal']
+        total_interest = totals['interest']
         
-        fig, ax = plt.subplots(figsize=(8, 6))
+        fig, ax = self._subplots(figsize=(8, 6))
         ax.pie([total_principal, total_interest], 
                labels=['Principal', 'Interest'],
                autopct='%1.1f%%',
@@ -52,7 +103,7 @@ class DataVisualizer:
     
     def create_comparison_chart(self, original_schedule, accelerated_schedule):
         """Compare original vs accelerated repayment"""
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._subplots(figsize=(10, 6))
         
         ax.plot(original_schedule['month'], original_schedule['remaining_balance'], 
                 label='Original Plan', color='#7209b7', linewidth=2)
@@ -68,7 +119,7 @@ class DataVisualizer:
     
     def create_summary_chart(self, monthly_payment, total_interest, total_principal):
         """Create summary bar chart"""
-        fig, ax = plt.subplots(figsize=(10, 6))
+        fig, ax = self._subplots(figsize=(10, 6))
         
         categories = ['Monthly EMI', 'Total Interest', 'Total Principal']
         values = [monthly_payment, total_interest, total_principal]
@@ -87,16 +138,19 @@ class DataVisualizer:
                    formatted_value,
                    ha='center', va='bottom', fontweight='bold')
         
-        plt.xticks(rotation=45)
-        plt.tight_layout()
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
         return fig
     
-    def create_interest_vs_principal_chart(self, schedule_df):
+    def create_interest_vs_principal_chart(self, schedule_df, schedule_index=None):
         """Create cumulative interest vs principal chart"""
-        fig, ax = plt.subplots(figsize=(10, 6))
+        if schedule_index is None:
+            schedule_index = ScheduleIndex(schedule_df)
         
-        cumulative_principal = schedule_df['principal'].cumsum()
-        cumulative_interest = schedule_df['interest'].cumsum()
+        fig, ax = self._subplots(figsize=(10, 6))
+        
+        cumulative_principal = schedule_index.cumulative('principal')
+        cumulative_interest = schedule_index.cumulative('interest')
         
         ax.plot(schedule_df['month'], cumulative_principal, 
                 label='Cumulative Principal', color='#4361ee', linewidth=2)
@@ -110,17 +164,14 @@ class DataVisualizer:
         
         return fig
     
-    def create_yearly_breakdown_chart(self, schedule_df):
+    def create_yearly_breakdown_chart(self, schedule_df, schedule_index=None):
         """Create yearly payment breakdown"""
-        # Group by year
-        schedule_df['year'] = (schedule_df['month'] - 1) // 12 + 1
-        yearly_data = schedule_df.groupby('year').agg({
-            'principal': 'sum',
-            'interest': 'sum',
-            'payment': 'sum'
-        }).reset_index()
+        # Roll up by loan year from prefix sums, leaving the caller's schedule untouched
+        if schedule_index is None:
+            schedule_index = ScheduleIndex(schedule_df)
+        yearly_data = schedule_index.yearly_totals()
         
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax = self._subplots(figsize=(12, 6))
         
         x = yearly_data['year']
         principal = yearly_data['principal']
@@ -139,9 +190,32 @@ class DataVisualizer:
         if len(x) > 10:
             ax.set_xticks(x[::2])
         
-        plt.tight_layout()
+        fig.tight_layout()
         return fig
 
+    def create_refinance_comparison_chart(self, comparison_df, top_n=10):
+        """Compare net savings and break-even month of refinance offers"""
+        top_offers = comparison_df.head(top_n).iloc[::-1]
+        
+        fig, ax = self._subplots(figsize=(10, max(3, 0.6 * len(top_offers) + 1.5)))
+        
+        colors = np.where(top_offers['net_savings'] > 0, '#4cc9f0', '#f72585')
+        bars = ax.barh(top_offers['lender'].astype(str), top_offers['net_savings'], color=colors, alpha=0.8)
+        ax.axvline(0, color='#6c757d', linewidth=1)
+        ax.set_title('Balance Transfer Offers - Net Savings')
+        ax.set_xlabel('Net Savings (₹)')
+        ax.grid(True, axis='x', alpha=0.3)
+        
+        # Label each bar with its savings and break-even month
+        for bar, savings, break_even in zip(bars, top_offers['net_savings'], top_offers['break_even_month']):
+            label = f'₹{savings:,.0f}'
+            label += f' (break-even: month {int(break_even)})' if pd.notna(break_even) else ' (never breaks even)'
+            ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2, f' {label} ',
+                    ha='left' if savings >= 0 else 'right', va='center', fontsize=9)
+        
+        fig.tight_layout()
+        return fig
+    
 # Test function to verify the visualizer works
 def test_visualizer():
     """Test the visualizer with sample data"""
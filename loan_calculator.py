@@ -1,13 +1,70 @@
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 class LoanCalculator:
-    def __init__(self):
+    def __init__(self, cache_size=None):
         self.payment_history = []
+        # Memoization is opt-in: cache_size=None keeps the original behaviour,
+        # a positive integer enables an LRU cache holding that many results
+        if cache_size is not None and (not isinstance(cache_size, int) or cache_size < 1):
+            raise ValueError(f"cache_size must be None or a positive integer, got {cache_size!r}")
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    @staticmethod
+    def _normalize_loan(principal, annual_rate, years):
+        """Normalize loan parameters so equivalent inputs share a cache key"""
+        return (round(float(principal), 2), round(float(annual_rate), 6), round(float(years), 6))
+    
+    def _memoize(self, key, compute):
+        """Return a cached result for key, computing and storing it on a miss"""
+        if not self.cache_size:
+            return compute()
+        
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+        
+        self.cache_misses += 1
+        result = compute()
+        self._cache[key] = result
+        
+        # Evict least recently used entries beyond the configured size
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        
+        return result
+    
+    def cache_info(self):
+        """Return memoization hit/miss counters and current cache size"""
+        total = self.cache_hits + self.cache_misses
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total else 0.0,
+            'size': len(self._cache),
+            'max_size': self.cache_size
+        }
+    
+    def cache_clear(self):
+        """Drop all memoized results and reset the counters"""
+        self._cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def calculate_monthly_payment(self, principal, annual_rate, years):
         """Calculate monthly payment using amortization formula"""
+        key = ('monthly_payment',) + self._normalize_loan(principal, annual_rate, years)
+        return self._memoize(
+            key, lambda: self._compute_monthly_payment(principal, annual_rate, years)
+        )
+    
+    def _compute_monthly_payment(self, principal, annual_rate, years):
         monthly_rate = annual_rate / 12 / 100
         n_payments = years * 12
         
@@ -24,6 +81,17 @@ class LoanCalculator:
         if start_date is None:
             start_date = datetime.now()
         
+        # Dates are day-granular, so schedules starting on the same day can be shared
+        key = (('schedule',) + self._normalize_loan(principal, annual_rate, years) +
+               (start_date.strftime('%Y-%m-%d'),))
+        schedule = self._memoize(
+            key,
+            lambda: self._compute_amortization_schedule(principal, annual_rate, years, start_date)
+        )
+        # Hand out copies so callers cannot mutate the cached schedule
+        return schedule.copy() if self.cache_size else schedule
+    
+    def _compute_amortization_schedule(self, principal, annual_rate, years, start_date):
         monthly_payment = self.calculate_monthly_payment(principal, annual_rate, years)
         monthly_rate = annual_rate / 12 / 100
         balance = principal
@@ -52,6 +120,20 @@ class LoanCalculator:
     
     def calculate_early_payoff_impact(self, principal, annual_rate, years, extra_payment):
         """Calculate impact of extra payments on loan term"""
+        # Payments are in paise precision; rounding before computing keeps the
+        # result identical to what the cache key describes
+        extra_payment = round(float(extra_payment), 2)
+        key = (('early_payoff',) + self._normalize_loan(principal, annual_rate, years) +
+               (extra_payment,))
+        impact = self._memoize(
+            key,
+            lambda: self._compute_early_payoff_impact(principal, annual_rate, years, extra_payment)
+        )
+        if self.cache_size:
+            impact = dict(impact, new_schedule=impact['new_schedule'].copy())
+        return impact
+    
+    def _compute_early_payoff_impact(self, principal, annual_rate, years, extra_payment):
         schedule = self.generate_amortization_schedule(principal, annual_rate, years)
         monthly_payment = self.calculate_monthly_payment(principal, annual_rate, years)
         total_payment = monthly_payment + extra_payment
@@ -90,4 +172,90 @@ class LoanCalculator:
             'months_saved': months_saved,
             'interest_saved': schedule['interest'].sum() - pd.DataFrame(new_schedule)['interest'].sum(),
             'new_schedule': pd.DataFrame(new_schedule)
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def _payment_counts(years):
+        """Whole number of monthly payments for (possibly fractional) terms in years"""
+        return np.round(np.asarray(years, dtype=float) * 12)
+    
+    def calculate_monthly_payments(self, principal, annual_rate, years):
+        """Vectorized monthly payment for arrays of loans"""
+        principal = np.asarray(principal, dtype=float)
+        monthly_rate = np.asarray(annual_rate, dtype=float) / 12 / 100
+        n_payments = self._payment_counts(years)
+        
+        growth = (1 + monthly_rate) ** n_payments
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amortized = principal * monthly_rate * growth / (growth - 1)
+        return np.where(monthly_rate == 0, principal / n_payments, amortized)
+    
+    def calculate_remaining_balances(self, principal, monthly_rate, payment, months):
+        """Vectorized closed-form balance after `months` payments"""
+        growth = (1 + monthly_rate) ** months
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amortized = principal * growth - payment * (growth - 1) / monthly_rate
+        return np.where(monthly_rate == 0, principal - payment * months, amortized)
+    
+    def generate_amortization_schedules(self, principal, annual_rate, years, loan_ids=None):
+        """Vectorized amortization schedules for arrays of loans, in long format"""
+        principal = np.asarray(principal, dtype=float)
+        annual_rate = np.asarray(annual_rate, dtype=float)
+        # The same payment count drives the EMI and the length of each schedule
+        n_payments = self._payment_counts(years).astype(int)
+        if loan_ids is None:
+            loan_ids = np.arange(len(principal))
+        
+        monthly_payment = self.calculate_monthly_payments(principal, annual_rate, years)
+        monthly_rate = annual_rate / 12 / 100
+        
+        # One row per loan, one column per month; months past a loan's term are masked out
+        months = np.arange(1, n_payments.max(initial=0) + 1)
+        col = lambda values: np.asarray(values)[:, None]
+        opening_balance = self.calculate_remaining_balances(col(principal), col(monthly_rate),
+                                                            col(monthly_payment), months - 1)
+        interest = opening_balance * col(monthly_rate)
+        principal_paid = col(monthly_payment) - interest
+        remaining = opening_balance - principal_paid
+        mask = months <= col(n_payments)
+        
+        loan_index, month_index = np.nonzero(mask)
+        return pd.DataFrame({
+            'loan_id': np.asarray(loan_ids)[loan_index],
+            'month': months[month_index],
+            'payment': np.round(monthly_payment[loan_index], 2),
+            'principal': np.round(principal_paid[mask], 2),
+            'interest': np.round(interest[mask], 2),
+            'remaining_balance': np.abs(np.round(remaining[mask], 2))
+        })
+    
+    def calculate_early_payoff_impacts(self, principal, annual_rate, years, extra_payment):
+        """Vectorized early payoff impact (months and interest saved) for arrays of loans"""
+        principal = np.asarray(principal, dtype=float)
+        monthly_rate = np.asarray(annual_rate, dtype=float) / 12 / 100
+        original_months = self._payment_counts(years).astype(int)
+        
+        monthly_payment = self.calculate_monthly_payments(principal, annual_rate, years)
+        # A negative extra payment would leave loans that never amortize (log of a
+        # non-positive number), so it is treated as no extra payment
+        total_payment = monthly_payment + np.maximum(np.asarray(extra_payment, dtype=float), 0)
+        
+        # Number of payments needed at the higher payment: solve balance(n) = 0 for n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exact_months = np.where(
+                monthly_rate == 0,
+                principal / total_payment,
+                -np.log1p(-monthly_rate * principal / total_payment) / np.log1p(monthly_rate)
+            )
+        new_months = np.ceil(np.round(exact_months, 9)).astype(int)
+        
+        # Full payments up to the last month, then the final partial payment
+        last_balance = self.calculate_remaining_balances(principal, monthly_rate, total_payment, new_months - 1)
+        new_interest = total_payment * (new_months - 1) + last_balance * (1 + monthly_rate) - principal
+        original_interest = monthly_payment * original_months - principal
+        
+        return pd.DataFrame({
+            'months_saved': original_months - new_months,
+            'interest_saved': original_interest - new_interest,
+            'new_months': new_months
+        })
@@ -1,8 +1,12 @@
+import os
+from datetime import date
 import streamlit as st
 import pandas as pd
 from loan_calculator import LoanCalculator
 from ai_advisor import AIAdvisor
 from data_visualizer import DataVisualizer
+from schedule_index import ScheduleIndex
+from plan_store import PlanStore
 import matplotlib.pyplot as plt
 
 # Configure the page
@@ -13,14 +17,24 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize components
-calculator = LoanCalculator()
-advisor = AIAdvisor()
+# Initialize components - the advisor shares the memoizing calculator so the
+# EMI and baseline schedule are computed once per plan
+calculator = LoanCalculator(cache_size=128)
+advisor = AIAdvisor(calculator=calculator)
 visualizer = DataVisualizer()
 
 # Train the AI model
 advisor.train_advisor()
 
+# Computed plans are shared across Streamlit processes and restarts. The store is
+# opened once per model version (not on every rerun); entries from a different
+# advisor model are dropped when it is opened
+@st.cache_resource
+def get_plan_store(path, model_version):
+    return PlanStore(path, model_version=model_version)
+
+plan_store = get_plan_store(os.environ.get('LOAN_PLAN_STORE', 'plan_store.sqlite'), advisor.model_version)
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -115,6 +129,14 @@ with st.sidebar:
     st.header("💸 Extra Payments")
     extra_payment = st.number_input("Extra Monthly Payment (₹)", min_value=0, value=5000, step=1000)
     
+    st.header("⚙️ Display Options")
+    concurrent_charts = st.checkbox("Show charts progressively", value=True,
+                                    help="Show metrics and recommendations first and add each chart as soon as it is ready")
+    parallel_charts = st.checkbox("Render charts in parallel processes", value=False,
+                                  disabled=not concurrent_charts,
+                                  help="Draw the charts at the same time on separate CPU cores "
+                                       "(otherwise they are drawn one after another in the background)")
+    
     calculate_btn = st.button("Calculate Repayment Plan", type="primary")
 
 # Main content
@@ -130,24 +152,53 @@ if calculate_btn:
         'risk_level': 'medium'
     }
     
+    # Schedule dates start today, so the date is part of the plan's inputs
+    plan_inputs = dict(loan_data, extra_payment=extra_payment, start_date=date.today().isoformat())
+    plan = plan_store.get(plan_inputs)
+    
     # Calculate schedules
-    with st.spinner("Generating Indian loan repayment plan..."):
-        original_schedule = calculator.generate_amortization_schedule(principal, annual_rate, years)
-        
-        if extra_payment > 0:
-            impact = calculator.calculate_early_payoff_impact(principal, annual_rate, years, extra_payment)
-            accelerated_schedule = impact['new_schedule']
+    if plan is None:
+        with st.spinner("Generating Indian loan repayment plan..."):
+            plan = {
+                'original_schedule': calculator.generate_amortization_schedule(principal, annual_rate, years),
+                'impact': None
+            }
+            
+            if extra_payment > 0:
+                plan['impact'] = calculator.calculate_early_payoff_impact(principal, annual_rate, years, extra_payment)
+            
+            # Get AI recommendations
+            plan['recommendations'] = advisor.get_recommendations(loan_data)
         
-        # Get AI recommendations
-        recommendations = advisor.get_recommendations(loan_data)
+        plan_store.put(plan_inputs, plan)
+    
+    original_schedule = plan['original_schedule']
+    impact = plan['impact']
+    recommendations = plan['recommendations']
+    if extra_payment > 0:
+        accelerated_schedule = impact['new_schedule']
     
     # Display key metrics in Indian Rupees
     col1, col2, col3, col4 = st.columns(4)
     
     monthly_payment = calculator.calculate_monthly_payment(principal, annual_rate, years)
-    total_payment = original_schedule['payment'].sum()
-    total_interest = original_schedule['interest'].sum()
-    total_principal = original_schedule['principal'].sum()
+    schedule_index = ScheduleIndex(original_schedule)
+    totals = schedule_index.totals()
+    total_payment = totals['payment']
+    total_interest = totals['interest']
+    total_principal = totals['principal']
+    
+    # The charts are independent of each other, so start rendering them in the
+    # background now; metrics and recommendations are written while they render
+    if concurrent_charts:
+        chart_jobs = {
+            'amortization': ('create_amortization_chart', (original_schedule,)),
+            'breakdown': ('create_payment_breakdown', (original_schedule, schedule_index)),
+            'summary': ('create_summary_chart', (monthly_payment, total_interest, total_principal))
+        }
+        if extra_payment > 0:
+            chart_jobs['comparison'] = ('create_comparison_chart', (original_schedule, accelerated_schedule))
+        chart_results = visualizer.render_charts_concurrently(chart_jobs, use_processes=parallel_charts)
     
     with col1:
         st.markdown(f"""
@@ -246,28 +297,68 @@ if calculate_btn:
     # Create charts using Matplotlib
     col1, col2 = st.columns(2)
     
-    with col1:
-        # Amortization chart
-        st.subheader("EMI Composition & Balance")
-        amort_fig = visualizer.create_amortization_chart(original_schedule)
-        st.pyplot(amort_fig)
+    if concurrent_charts:
+        # Reserve a slot per chart; each is filled as soon as its render finishes
+        chart_slots = {}
+        with col1:
+            st.subheader("EMI Composition & Balance")
+            chart_slots['amortization'] = st.empty()
+            st.subheader("Payment Breakdown")
+            chart_slots['breakdown'] = st.empty()
         
-        # Pie chart
-        st.subheader("Payment Breakdown")
-        pie_fig = visualizer.create_payment_breakdown(original_schedule)
-        st.pyplot(pie_fig)
-    
-    with col2:
-        # Summary chart
-        st.subheader("Loan Summary")
-        summary_fig = visualizer.create_summary_chart(monthly_payment, total_interest, total_principal)
-        st.pyplot(summary_fig)
+        with col2:
+            st.subheader("Loan Summary")
+            chart_slots['summary'] = st.empty()
+            if extra_payment > 0:
+                st.subheader("Accelerated vs Original Repayment")
+                chart_slots['comparison'] = st.empty()
         
-        # Comparison chart if extra payments
-        if extra_payment > 0:
-            st.subheader("Accelerated vs Original Repayment")
-            comp_fig = visualizer.create_comparison_chart(original_schedule, accelerated_schedule)
-            st.pyplot(comp_fig)
+        for slot in chart_slots.values():
+            slot.info("Rendering chart...")
+        
+        # Fill in the charts in the order they finish rendering
+        for chart_name, chart_png, chart_error in chart_results:
+            if chart_error is not None:
+                chart_slots[chart_name].error(f"Could not render this chart: {chart_error}")
+            else:
+                chart_slots[chart_name].image(chart_png, use_column_width=True)
+    else:
+        with col1:
+            # Amortization chart
+            st.subheader("EMI Composition & Balance")
+            amort_fig = visualizer.create_amortization_chart(original_schedule)
+            st.pyplot(amort_fig)
+            
+            # Pie chart
+            st.subheader("Payment Breakdown")
+            pie_fig = visualizer.create_payment_breakdown(original_schedule, schedule_index)
+            st.pyplot(pie_fig)
+        
+        with col2:
+            # Summary chart
+            st.subheader("Loan Summary")
+            summary_fig = visualizer.create_summary_chart(monthly_payment, total_interest, total_principal)
+            st.pyplot(summary_fig)
+            
+            # Comparison chart if extra payments
+            if extra_payment > 0:
+                st.subheader("Accelerated vs Original Repayment")
+                comp_fig = visualizer.create_comparison_chart(original_schedule, accelerated_schedule)
+                st.pyplot(comp_fig)
+    
+    # Financial year tax summary (April-March) from the schedule index
+    st.markdown('<h2 class="sub-header">🧾 Financial Year Tax Summary</h2>', unsafe_allow_html=True)
+    
+    fy_summary = schedule_index.financial_year_totals().rename(columns={
+        'financial_year': 'Financial Year',
+        'interest': 'Interest (Section 24)',
+        'principal': 'Principal (Section 80C)',
+        'payment': 'Total EMI Paid'
+    })
+    for col in ['Interest (Section 24)', 'Principal (Section 80C)', 'Total EMI Paid']:
+        fy_summary[col] = fy_summary[col].apply(lambda x: f'₹{x:,.0f}')
+    
+    st.dataframe(fy_summary, use_container_width=True)
     
     # Amortization Schedule
     st.markdown('<h2 class="sub-header">📋 Amortization Schedule</h2>', unsafe_allow_html=True)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import numbers
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import warnings
+
+class PlanStore:
+    """Persistent SQLite cache of computed loan plans, shared across processes and restarts
+    
+    Plans are keyed by their normalized inputs and the advisor model version, so
+    retraining the model automatically invalidates older entries. The database
+    runs in WAL mode, which lets any number of readers proceed while one writer
+    stores a new plan. Payloads are pickled, so only point this at a local file
+    the app itself writes.
+    
+    The store is only a cache: if the database cannot be opened, is locked past the
+    timeout or is corrupt, reads become misses and writes are skipped.
+    """
+    
+    # Only refresh a plan's access time once per interval to keep reads write-free
+    TOUCH_INTERVAL = 60
+    
+    def __init__(self, path='plan_store.sqlite', model_version='', max_entries=1000):
+        self.path = path
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.available = True
+        
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS plans (
+                        key TEXT PRIMARY KEY,
+                        model_version TEXT NOT NULL,
+                        payload BLOB NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS plans_last_access ON plans (last_access)")
+        except (sqlite3.Error, OSError) as e:
+            self._disable(e)
+            return
+        
+        self.invalidate_stale()
+    
+    def _disable(self, error):
+        """Stop using a store that cannot be opened; plans are then always recomputed"""
+        self.available = False
+        warnings.warn(f"Plan store {self.path!r} is unavailable, caching disabled: {error}")
+    
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are not shareable)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def normalize_inputs(inputs):
+        """Canonical form of plan inputs: sorted keys, numbers rounded to a fixed precision"""
+        normalized = {}
+        for name, value in inputs.items():
+            if isinstance(value, bool) or value is None:
+                normalized[name] = value
+            elif isinstance(value, numbers.Real):
+                number = round(float(value), 6)
+                normalized[name] = int(number) if number.is_integer() else number
+            else:
+                normalized[name] = str(value)
+        return normalized
+    
+    def make_key(self, inputs):
+        """Hash of the normalized inputs and the model version"""
+        canonical = json.dumps(
+            {'inputs': self.normalize_inputs(inputs), 'model_version': self.model_version},
+            sort_keys=True
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def get(self, inputs):
+        """Return the stored plan for these inputs, or None on a miss"""
+        if not self.available:
+            return None
+        
+        key = self.make_key(inputs)
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT payload, last_access FROM plans WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            
+            payload, last_access = row
+            now = time.time()
+            if now - last_access > self.TOUCH_INTERVAL:
+                with conn:
+                    conn.execute("UPDATE plans SET last_access = ? WHERE key = ?", (now, key))
+        except (sqlite3.Error, OSError):
+            # A locked or damaged store is just a cache miss
+            return None
+        
+        try:
+            return pickle.loads(payload)
+        except Exception:
+            # Payloads pickled by older library versions may no longer load;
+            # treat them as a miss and drop them so the plan gets recomputed
+            try:
+                with conn:
+                    conn.execute("DELETE FROM plans WHERE key = ?", (key,))
+            except sqlite3.Error:
+                pass
+            return None
+    
+    def put(self, inputs, plan):
+        """Store a plan, evicting the least recently used plans beyond max_entries"""
+        if not self.available:
+            return
+        
+        key = self.make_key(inputs)
+        payload = pickle.dumps(plan, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO plans (key, model_version, payload, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, self.model_version, sqlite3.Binary(payload), now, now)
+                )
+                conn.execute("""
+                    DELETE FROM plans WHERE key IN (
+                        SELECT key FROM plans ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+        except (sqlite3.Error, OSError):
+            # Failing to cache a plan must not fail the request that computed it
+            pass
+    
+    def invalidate_stale(self):
+        """Drop plans computed with a different model version"""
+        try:
+            conn = self._connect()
+            with conn:
+                deleted = conn.execute(
+                    "DELETE FROM plans WHERE model_version != ?", (self.model_version,)
+                ).rowcount
+        except (sqlite3.Error, OSError):
+            # Stale plans can never be hit (the version is part of the key), so
+            # failing to purge them now only delays reclaiming their space
+            return 0
+        return deleted
+    
+    def clear(self):
+        """Drop every stored plan"""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM plans")
+    
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM plans").fetchone()[0]
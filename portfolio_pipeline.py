@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+import pandas as pd
+from loan_calculator import LoanCalculator
+from ai_advisor import AIAdvisor
+
+REQUIRED_COLUMNS = ['principal', 'annual_rate', 'years']
+PASSTHROUGH_COLUMNS = ['credit_score', 'monthly_income', 'monthly_expenses', 'risk_level']
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# Upper bound on loans x months per schedule batch; each intermediate array of a
+# batch is then at most ~16 MB, regardless of the tape chunk size
+SCHEDULE_BATCH_CELLS = 2000000
+
+# Per-process components, created once by _init_worker
+_calculator = None
+_advisor = None
+
+def _init_worker():
+    """Create and train the calculator/advisor once per worker process"""
+    global _calculator, _advisor
+    _calculator = LoanCalculator()
+    _advisor = AIAdvisor(calculator=_calculator)
+    _advisor.train_advisor()
+
+def iter_tape_chunks(tape_path, chunksize):
+    """Yield the loan tape in DataFrame chunks (CSV or Parquet, memory-mapped)"""
+    if tape_path.endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(tape_path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(tape_path, chunksize=chunksize, memory_map=True)
+
+def _prepare_chunk(chunk, chunk_id, chunksize, partition_by):
+    """Validate a tape chunk and fill in loan ids and the partition column
+    
+    Returns the valid loans and the rejected rows, each rejected row with the reason.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Loan tape is missing required columns: {missing}")
+    
+    chunk = chunk.reset_index(drop=True)
+    if 'loan_id' not in chunk.columns:
+        chunk['loan_id'] = np.arange(len(chunk)) + chunk_id * chunksize
+    
+    # Rows that cannot be amortized are reported instead of failing the whole chunk
+    values = {column: pd.to_numeric(chunk[column], errors='coerce') for column in REQUIRED_COLUMNS}
+    reasons = np.select(
+        [values['principal'].isna() | values['annual_rate'].isna() | values['years'].isna(),
+         values['principal'] <= 0,
+         values['annual_rate'] < 0,
+         np.round(values['years'] * 12) < 1],
+        ["missing or non-numeric principal/annual_rate/years",
+         "principal must be positive",
+         "annual_rate must not be negative",
+         "term must be at least one month"],
+        default=""
+    )
+    rejected = chunk[reasons != ""].assign(reject_reason=reasons[reasons != ""])
+    chunk = chunk[reasons == ""].reset_index(drop=True)
+    for column in REQUIRED_COLUMNS:
+        chunk[column] = chunk[column].astype(float)
+    
+    # Vintage defaults to the origination year when the tape does not carry it
+    if partition_by == 'vintage' and 'vintage' not in chunk.columns and 'origination_date' in chunk.columns:
+        chunk['vintage'] = pd.to_datetime(chunk['origination_date']).dt.year
+    if partition_by not in chunk.columns:
+        raise ValueError(f"Loan tape has no '{partition_by}' column to partition by")
+    
+    return chunk, rejected
+
+def _write_partitioned(df, dataset_dir, partition_by, file_id):
+    """Write df as Hive-style partitions with one deterministic file per chunk (or batch)"""
+    keys = df[partition_by].astype(object).where(df[partition_by].notna(), NULL_PARTITION)
+    for value, part in df.groupby(keys.astype(str), sort=False):
+        partition_dir = os.path.join(dataset_dir, f"{partition_by}={value.replace('/', '_')}")
+        os.makedirs(partition_dir, exist_ok=True)
+        
+        # Write to a temporary name first so an interrupted run never leaves a truncated file
+        path = os.path.join(partition_dir, f"part-{file_id}.parquet")
+        tmp_path = path + '.tmp'
+        part.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+def _write_schedules(chunk, chunk_id, output_dir, partition_by):
+    """Generate and write schedules in batches bounded by loans x months"""
+    max_months = max(int(np.ceil(chunk['years'].max() * 12)), 1) if len(chunk) else 1
+    batch_size = max(SCHEDULE_BATCH_CELLS // max_months, 1)
+    
+    for batch_number, start in enumerate(range(0, len(chunk), batch_size)):
+        batch = chunk.iloc[start:start + batch_size]
+        schedules = _calculator.generate_amortization_schedules(
+            batch['principal'], batch['annual_rate'], batch['years']
+        )
+        # Schedules come back keyed by row position; map them to the tape's ids and partitions
+        positions = schedules['loan_id'].to_numpy()
+        schedules['loan_id'] = batch['loan_id'].to_numpy()[positions]
+        schedules[partition_by] = batch[partition_by].to_numpy()[positions]
+        _write_partitioned(schedules, os.path.join(output_dir, 'schedules'), partition_by,
+                           f"{chunk_id:06d}-{batch_number:04d}")
+
+def process_chunk(chunk, chunk_id, chunksize, output_dir, partition_by, write_schedules=False):
+    """Compute recommendations (and optionally schedules) for one chunk and write them"""
+    if _advisor is None:
+        _init_worker()
+    
+    chunk, rejected = _prepare_chunk(chunk, chunk_id, chunksize, partition_by)
+    if len(rejected):
+        rejected_dir = os.path.join(output_dir, 'rejected')
+        os.makedirs(rejected_dir, exist_ok=True)
+        path = os.path.join(rejected_dir, f"part-{chunk_id:06d}.parquet")
+        rejected.astype({column: str for column in rejected.columns if rejected[column].dtype == object}) \
+            .to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    
+    recommendations = _advisor.get_recommendations_batch(chunk)
+    keep = ['loan_id', partition_by] + [column for column in REQUIRED_COLUMNS + PASSTHROUGH_COLUMNS
+                                        if column in chunk.columns and column != partition_by]
+    recommendations = pd.concat([chunk[keep], recommendations], axis=1)
+    recommendations['monthly_payment'] = np.round(_calculator.calculate_monthly_payments(
+        chunk['principal'], chunk['annual_rate'], chunk['years']
+    ), 2)
+    _write_partitioned(recommendations, os.path.join(output_dir, 'recommendations'), partition_by, f"{chunk_id:06d}")
+    
+    if write_schedules:
+        _write_schedules(chunk, chunk_id, output_dir, partition_by)
+    
+    # The marker is written last: a chunk only counts as done once all its files exist
+    marker = os.path.join(output_dir, '_progress', f"chunk-{chunk_id:06d}.done")
+    with open(marker + '.tmp', 'w') as f:
+        f.write(str(len(chunk)))
+    os.replace(marker + '.tmp', marker)
+    
+    return chunk_id, len(chunk), len(rejected)
+
+def _load_manifest(output_dir, tape_path, chunksize, partition_by):
+    """Create or check the run manifest so resumed runs use the same chunking"""
+    os.makedirs(os.path.join(output_dir, '_progress'), exist_ok=True)
+    manifest_path = os.path.join(output_dir, '_manifest.json')
+    manifest = {
+        'tape': os.path.abspath(tape_path),
+        'chunksize': chunksize,
+        'partition_by': partition_by
+    }
+    
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            existing = json.load(f)
+        if existing != manifest:
+            raise ValueError(
+                f"Output directory was started with different settings {existing}; "
+                f"use a new output directory or matching settings"
+            )
+    else:
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    
+    done = set()
+    for name in os.listdir(os.path.join(output_dir, '_progress')):
+        if name.startswith('chunk-') and name.endswith('.done'):
+            done.add(int(name[len('chunk-'):-len('.done')]))
+    return done
+
+def _print_progress(chunks_done, rows_done, elapsed):
+    rate = rows_done / elapsed if elapsed > 0 else 0.0
+    print(f"[pipeline] {chunks_done} chunks, {rows_done:,} loans, {rate:,.0f} loans/s",
+          file=sys.stderr, flush=True)
+
+def run_pipeline(tape_path, output_dir, chunksize=100000, partition_by='product',
+                 workers=None, write_schedules=False, progress=_print_progress):
+    """Process a loan tape chunk by chunk across worker processes, resuming finished chunks"""
+    done = _load_manifest(output_dir, tape_path, chunksize, partition_by)
+    workers = workers or os.cpu_count() or 1
+    
+    start = time.time()
+    chunks_done = 0
+    rows_done = 0
+    rows_rejected = 0
+    
+    def record(result):
+        nonlocal chunks_done, rows_done, rows_rejected
+        chunks_done += 1
+        rows_done += result[1]
+        rows_rejected += result[2]
+        if progress is not None:
+            progress(chunks_done, rows_done, time.time() - start)
+    
+    if workers == 1:
+        _init_worker()
+        for chunk_id, chunk in enumerate(iter_tape_chunks(tape_path, chunksize)):
+            if chunk_id not in done:
+                record(process_chunk(chunk, chunk_id, chunksize, output_dir, partition_by, write_schedules))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = set()
+            for chunk_id, chunk in enumerate(iter_tape_chunks(tape_path, chunksize)):
+                if chunk_id in done:
+                    continue
+                
+                # Bound the number of chunks in flight so the tape is never fully in memory
+                if len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+                
+                pending.add(pool.submit(process_chunk, chunk, chunk_id, chunksize,
+                                        output_dir, partition_by, write_schedules))
+            
+            for future in wait(pending).done:
+                record(future.result())
+    
+    return {
+        'chunks_processed': chunks_done,
+        'chunks_skipped': len(done),
+        'loans_processed': rows_done,
+        'loans_rejected': rows_rejected,
+        'elapsed_seconds': time.time() - start
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk loan tape repayment planner")
+    parser.add_argument('tape', help="Loan tape (.csv or .parquet)")
+    parser.add_argument('output_dir', help="Directory for partitioned Parquet output")
+    parser.add_argument('--chunksize', type=int, default=100000, help="Loans per chunk")
+    parser.add_argument('--partition-by', default='product', help="Partition column, e.g. product or vintage")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--schedules', action='store_true', help="Also write full amortization schedules")
+    args = parser.parse_args(argv)
+    
+    summary = run_pipeline(args.tape, args.output_dir, chunksize=args.chunksize,
+                           partition_by=args.partition_by, workers=args.workers,
+                           write_schedules=args.schedules)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from loan_calculator import LoanCalculator
+
+class RefinanceEngine:
+    """Compare a current loan against competing balance-transfer offers in one vectorized pass"""
+    
+    COMPARISON_COLUMNS = ['rank', 'lender', 'annual_rate', 'tenure_months', 'new_emi', 'emi_change',
+                          'switching_cost', 'interest_current', 'interest_new', 'net_savings',
+                          'break_even_month']
+    
+    def __init__(self, calculator=None):
+        self.calculator = calculator if calculator is not None else LoanCalculator()
+    
+    def _interest_paid(self, balance, monthly_rate, payment, n_months, months):
+        """Interest paid over the first `months` payments (rows: offers, columns: months)"""
+        months = np.minimum(months, n_months)
+        remaining = self.calculator.calculate_remaining_balances(balance, monthly_rate, payment, months)
+        return payment * months - (balance - remaining)
+    
+    def compare_offers(self, outstanding, annual_rate, remaining_months, offers):
+        """Rank refinance offers by net savings and break-even month
+        
+        Savings are closed-form; the break-even month is a vectorized grid search.
+        
+        Each offer needs 'annual_rate' and may give 'lender', 'processing_fee' (₹),
+        'tenure_years' (defaults to the remaining term) and 'prepayment_penalty'
+        (% of the outstanding balance charged for foreclosing the current loan).
+        """
+        if remaining_months <= 0:
+            raise ValueError(f"remaining_months must be positive, got {remaining_months}")
+        
+        offers = pd.DataFrame(offers).reset_index(drop=True)
+        n_offers = len(offers)
+        if n_offers == 0:
+            return pd.DataFrame(columns=self.COMPARISON_COLUMNS)
+        if 'annual_rate' not in offers.columns or offers['annual_rate'].isna().any():
+            raise ValueError("Every refinance offer needs an 'annual_rate'")
+        
+        column = lambda name, default: (offers[name].fillna(default).to_numpy(dtype=float)
+                                        if name in offers.columns else np.full(n_offers, default, dtype=float))
+        
+        offer_rate = offers['annual_rate'].to_numpy(dtype=float)
+        offer_months = np.round(column('tenure_years', remaining_months / 12) * 12).astype(int)
+        if (offer_months < 1).any():
+            raise ValueError("Every refinance offer needs a tenure_years of at least one month")
+        switching_cost = column('processing_fee', 0.0) + outstanding * column('prepayment_penalty', 0.0) / 100
+        
+        # Current loan, continued as is
+        current_rate = annual_rate / 12 / 100
+        current_emi = float(self.calculator.calculate_monthly_payments(outstanding, annual_rate, remaining_months / 12))
+        
+        # Every offer at once, each refinancing the outstanding balance
+        offer_monthly_rate = offer_rate / 12 / 100
+        offer_emi = self.calculator.calculate_monthly_payments(outstanding, offer_rate, offer_months / 12)
+        
+        current_interest = current_emi * remaining_months - outstanding
+        offer_interest = offer_emi * offer_months - outstanding
+        net_savings = current_interest - offer_interest - switching_cost
+        
+        # Break-even has no closed form: cumulative interest of each loan is linear plus an
+        # exponential in its own rate, so the difference is searched on an offers x months grid
+        # (each cell itself closed-form). Break-even is the first month covering the switching cost
+        months = np.arange(1, max(remaining_months, offer_months.max(initial=0)) + 1)
+        cumulative_advantage = (
+            self._interest_paid(outstanding, current_rate, current_emi, remaining_months, months)[None, :] -
+            self._interest_paid(outstanding, offer_monthly_rate[:, None], offer_emi[:, None],
+                                offer_months[:, None], months[None, :]) -
+            switching_cost[:, None]
+        )
+        breaks_even = cumulative_advantage >= 0
+        break_even_month = np.where(breaks_even.any(axis=1), breaks_even.argmax(axis=1) + 1, np.nan)
+        
+        comparison = pd.DataFrame({
+            'lender': offers['lender'] if 'lender' in offers.columns else [f"Offer {i + 1}" for i in range(n_offers)],
+            'annual_rate': offer_rate,
+            'tenure_months': offer_months,
+            'new_emi': np.round(offer_emi, 2),
+            'emi_change': np.round(offer_emi - current_emi, 2),
+            'switching_cost': np.round(switching_cost, 2),
+            'interest_current': round(current_interest, 2),
+            'interest_new': np.round(offer_interest, 2),
+            'net_savings': np.round(net_savings, 2),
+            'break_even_month': break_even_month
+        })
+        
+        comparison = comparison.sort_values('net_savings', ascending=False, kind='mergesort').reset_index(drop=True)
+        comparison.insert(0, 'rank', np.arange(1, n_offers + 1))
+        return comparison
+    
+    def best_offer(self, outstanding, annual_rate, remaining_months, offers):
+        """Return the top-ranked offer as a dict, or None if no offer saves money"""
+        comparison = self.compare_offers(outstanding, annual_rate, remaining_months, offers)
+        if comparison.empty or comparison.loc[0, 'net_savings'] <= 0:
+            return None
+        return comparison.loc[0].to_dict()
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+class ScheduleIndex:
+    """Prefix-sum index over an amortization schedule for O(1) range totals"""
+    
+    COLUMNS = ('principal', 'interest', 'payment')
+    
+    def __init__(self, schedule_df):
+        self.n_months = len(schedule_df)
+        
+        # Cumulative sums with a leading zero so that
+        # total(a..b) = cumulative[b] - cumulative[a - 1]
+        self._cumulative = {}
+        for column in self.COLUMNS:
+            if column in schedule_df.columns:
+                values = pd.to_numeric(schedule_df[column], errors='coerce').fillna(0).to_numpy(dtype=float)
+            elif column == 'payment':
+                # Schedules without a payment column still have principal + interest
+                values = np.diff(self._cumulative['principal'] + self._cumulative['interest'])
+            else:
+                raise KeyError(f"Schedule is missing the '{column}' column")
+            self._cumulative[column] = np.concatenate(([0.0], np.cumsum(values)))
+        
+        # Payment dates are ordered, so each Indian financial year (April-March)
+        # is a contiguous run of rows; store its row boundaries once
+        self._fy_years = None
+        self._fy_boundaries = None
+        if 'date' in schedule_df.columns and not self.n_months:
+            # An empty schedule still supports rollups; they are simply empty
+            self._fy_boundaries = np.array([0])
+            self._fy_years = np.array([], dtype=int)
+        elif 'date' in schedule_df.columns:
+            dates = pd.DatetimeIndex(pd.to_datetime(schedule_df['date']))
+            fy_start = np.where(dates.month >= 4, dates.year, dates.year - 1)
+            change_points = np.flatnonzero(np.diff(fy_start)) + 1
+            self._fy_boundaries = np.concatenate(([0], change_points, [self.n_months]))
+            self._fy_years = fy_start[self._fy_boundaries[:-1]]
+    
+    def _clip(self, start_month, end_month):
+        start = max(int(start_month), 1)
+        end = min(int(end_month), self.n_months)
+        return start, end
+    
+    def paid_between(self, start_month, end_month):
+        """Principal, interest and payment totals for months start..end (inclusive)"""
+        start, end = self._clip(start_month, end_month)
+        if start > end:
+            return {column: 0.0 for column in self.COLUMNS}
+        
+        return {
+            column: float(cumulative[end] - cumulative[start - 1])
+            for column, cumulative in self._cumulative.items()
+        }
+    
+    def totals(self):
+        """Totals over the whole schedule"""
+        return self.paid_between(1, self.n_months)
+    
+    def cumulative(self, column):
+        """Running total of a column after each month (without the leading zero)"""
+        return self._cumulative[column][1:]
+    
+    def _rollup(self, labels, boundaries, label_name):
+        """Sum each column between consecutive (0-based, exclusive) row boundaries"""
+        starts = np.asarray(boundaries[:-1])
+        ends = np.asarray(boundaries[1:])
+        rollup = pd.DataFrame({label_name: labels})
+        for column, cumulative in self._cumulative.items():
+            rollup[column] = cumulative[ends] - cumulative[starts]
+        return rollup
+    
+    def yearly_totals(self):
+        """Totals per loan year (year 1 = months 1-12)"""
+        n_years = (self.n_months + 11) // 12
+        boundaries = [min(year * 12, self.n_months) for year in range(n_years + 1)]
+        return self._rollup(list(range(1, n_years + 1)), boundaries, 'year')
+    
+    def _require_dates(self):
+        if self._fy_boundaries is None:
+            raise KeyError("Schedule has no 'date' column for financial-year rollups")
+    
+    def paid_in_financial_year(self, start_year):
+        """Totals for the financial year starting 1 April of start_year (e.g. 2025 for FY2025-26)"""
+        self._require_dates()
+        position = np.searchsorted(self._fy_years, start_year)
+        if position == len(self._fy_years) or self._fy_years[position] != start_year:
+            return {column: 0.0 for column in self.COLUMNS}
+        
+        # Boundaries are 0-based exclusive row offsets, i.e. months start + 1..end
+        return self.paid_between(self._fy_boundaries[position] + 1, self._fy_boundaries[position + 1])
+    
+    def financial_year_totals(self):
+        """Totals per Indian financial year, e.g. for Section 24/80C claims"""
+        self._require_dates()
+        labels = [f"FY{year}-{str(year + 1)[-2:]}" for year in self._fy_years]
+        return self._rollup(labels, self._fy_boundaries, 'financial_year')
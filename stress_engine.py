@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from loan_calculator import LoanCalculator
+from ai_advisor import AIAdvisor
+
+DEFAULT_INCOME_DROPS = np.round(np.arange(0, 0.51, 0.05), 2)     # fraction of income lost
+DEFAULT_EXPENSE_GROWTH = np.round(np.arange(0, 0.51, 0.05), 2)   # fraction added to expenses
+DEFAULT_RATE_HIKES = np.round(np.arange(0, 3.01, 0.25), 2)       # percentage points added to the rate
+
+# A 100% income drop would divide DTI by zero; custom grids are clipped to this
+MAX_INCOME_DROP = 0.99
+
+# Risk thresholds crossed under stress: DTI levels from AIAdvisor plus payoff feasibility
+THRESHOLDS = {
+    'medium': lambda dti, surplus: dti > AIAdvisor.MEDIUM_RISK_DTI,
+    'high': lambda dti, surplus: dti > AIAdvisor.HIGH_RISK_DTI,
+    'infeasible': lambda dti, surplus: surplus < 0
+}
+
+def _borrower_arrays(portfolio_df):
+    """Pull loan and income columns out of a portfolio, with AIAdvisor's defaults"""
+    n_loans = len(portfolio_df)
+    column = lambda name, default: (portfolio_df[name].fillna(default).to_numpy(dtype=float)
+                                    if name in portfolio_df.columns else np.full(n_loans, default, dtype=float))
+    return {
+        'principal': portfolio_df['principal'].to_numpy(dtype=float),
+        'annual_rate': portfolio_df['annual_rate'].to_numpy(dtype=float),
+        'years': portfolio_df['years'].to_numpy(dtype=float),
+        'monthly_income': column('monthly_income', 5000),
+        'monthly_expenses': column('monthly_expenses', 3000)
+    }
+
+def _first_crossing(crossed, shocks):
+    """Smallest shock (columns sorted ascending) at which each row crosses, NaN if never"""
+    return np.where(crossed.any(axis=1), shocks[crossed.argmax(axis=1)], np.nan)
+
+def _stress_chunk(portfolio_df, income_drops, expense_growth, rate_hikes):
+    """Single-factor stress of one chunk of borrowers (runs inside a pool worker)"""
+    calculator = LoanCalculator()
+    loans = _borrower_arrays(portfolio_df)
+    col = lambda values: values[:, None]
+    
+    emi = calculator.calculate_monthly_payments(loans['principal'], loans['annual_rate'], loans['years'])
+    income = loans['monthly_income']
+    expenses = loans['monthly_expenses']
+    
+    # Each axis is shocked on its own, the others held at today's values (rows: borrowers, columns: shocks)
+    stressed_income = col(income) * (1 - income_drops)
+    stressed_expenses = col(expenses) * (1 + expense_growth)
+    stressed_emi = calculator.calculate_monthly_payments(
+        col(loans['principal']), col(loans['annual_rate']) + rate_hikes, col(loans['years'])
+    )
+    scenarios = {
+        'income_drop': (income_drops, col(emi) / stressed_income,
+                        stressed_income - col(expenses) - col(emi)),
+        'expense_growth': (expense_growth, None, col(income) - stressed_expenses - col(emi)),
+        'rate_hike': (rate_hikes, stressed_emi / col(income),
+                      col(income) - col(expenses) - stressed_emi)
+    }
+    
+    result = pd.DataFrame({
+        'monthly_payment': np.round(emi, 2),
+        'debt_to_income': emi / income,
+        'surplus': income - expenses - emi
+    }, index=portfolio_df.index)
+    
+    for axis, (shocks, dti, surplus) in scenarios.items():
+        for threshold, crossed in THRESHOLDS.items():
+            # DTI ignores expenses, so expense growth can only move feasibility
+            if dti is None and threshold != 'infeasible':
+                continue
+            result[f'{axis}_to_{threshold}'] = _first_crossing(crossed(dti, surplus), shocks)
+    
+    return result
+
+def _aggregate_chunk(portfolio_df, income_drops, expense_growth, rate_hikes):
+    """Count borrowers past each threshold for every combined scenario (runs inside a pool worker)"""
+    calculator = LoanCalculator()
+    loans = _borrower_arrays(portfolio_df)
+    
+    # Broadcast to (borrowers, income drops, expense growth, rate hikes)
+    income = loans['monthly_income'][:, None, None, None] * (1 - income_drops[None, :, None, None])
+    expenses = loans['monthly_expenses'][:, None, None, None] * (1 + expense_growth[None, None, :, None])
+    emi = calculator.calculate_monthly_payments(
+        loans['principal'][:, None], loans['annual_rate'][:, None] + rate_hikes[None, :], loans['years'][:, None]
+    )[:, None, None, :]
+    
+    surplus = income - expenses - emi
+    # DTI has no expense axis; broadcast it so every threshold counts over the full grid
+    dti = np.broadcast_to(emi / income, surplus.shape)
+    return {threshold: crossed(dti, surplus).sum(axis=0) for threshold, crossed in THRESHOLDS.items()}
+
+class StressTester:
+    """Vectorized affordability stress tests over income, expense and rate shocks, batched over portfolios"""
+    
+    def __init__(self, income_drops=None, expense_growth=None, rate_hikes=None, n_jobs=1, chunksize=20000):
+        self.income_drops = self._prepare_grid(
+            np.clip(self._grid_values(income_drops, DEFAULT_INCOME_DROPS), None, MAX_INCOME_DROP)
+        )
+        self.expense_growth = self._prepare_grid(self._grid_values(expense_growth, DEFAULT_EXPENSE_GROWTH))
+        self.rate_hikes = self._prepare_grid(self._grid_values(rate_hikes, DEFAULT_RATE_HIKES))
+        self.n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+        self.chunksize = chunksize
+    
+    @staticmethod
+    def _grid_values(grid, default):
+        return np.asarray(default if grid is None else grid, dtype=float).ravel()
+    
+    @staticmethod
+    def _prepare_grid(grid):
+        """Sorted, de-duplicated grid that always starts with the no-shock scenario 0"""
+        # Sorting makes the first crossing the smallest shock; 0 tells "already crossed today" apart
+        return np.unique(np.concatenate(([0.0], grid)))
+    
+    def _map_chunks(self, function, portfolio_df, chunksize):
+        """Apply function to portfolio chunks, across processes when n_jobs > 1"""
+        chunks = [portfolio_df.iloc[start:start + chunksize] for start in range(0, len(portfolio_df), chunksize)]
+        grids = (self.income_drops, self.expense_growth, self.rate_hikes)
+        
+        if self.n_jobs == 1 or len(chunks) <= 1:
+            return [function(chunk, *grids) for chunk in chunks]
+        
+        with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+            return list(pool.map(function, chunks, *[[grid] * len(chunks) for grid in grids]))
+    
+    def stress_test(self, portfolio_df):
+        """Per borrower, the smallest shock on each axis that crosses each risk threshold
+        
+        Columns are named '<axis>_to_<threshold>' for axes income_drop and rate_hike
+        and thresholds medium, high (AIAdvisor's DTI levels) and infeasible (EMI no
+        longer covered after expenses). Expense growth does not change DTI, so that
+        axis only has 'expense_growth_to_infeasible'. NaN means the threshold is not
+        crossed anywhere on the grid; 0 means it is already crossed today (every grid
+        includes the no-shock value 0, and income drops are capped at MAX_INCOME_DROP).
+        """
+        results = self._map_chunks(_stress_chunk, portfolio_df, self.chunksize)
+        if not results:
+            return pd.DataFrame(index=portfolio_df.index)
+        return pd.concat(results)
+    
+    def stress_grid(self, portfolio_df):
+        """Share of the portfolio past each threshold for every combined shock scenario"""
+        # The combined grid multiplies memory per borrower, so use proportionally smaller chunks
+        grid_size = len(self.income_drops) * len(self.expense_growth) * len(self.rate_hikes)
+        chunksize = max(1, self.chunksize * 16 // max(grid_size, 1))
+        counts = self._map_chunks(_aggregate_chunk, portfolio_df, chunksize)
+        
+        income_drop, expense_growth, rate_hike = np.meshgrid(
+            self.income_drops, self.expense_growth, self.rate_hikes, indexing='ij'
+        )
+        grid = pd.DataFrame({
+            'income_drop': income_drop.ravel(),
+            'expense_growth': expense_growth.ravel(),
+            'rate_hike': rate_hike.ravel()
+        })
+        n_loans = max(len(portfolio_df), 1)
+        for threshold in THRESHOLDS:
+            total = sum(count[threshold] for count in counts) if counts else np.zeros(grid_size)
+            grid[f'share_{threshold}'] = np.ravel(total) / n_loans
+        return grid